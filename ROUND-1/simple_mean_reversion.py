@@ -1,19 +1,35 @@
 import json
+from collections import deque
 from datamodel import Order, OrderDepth, TradingState
-from typing import Dict, List
+from typing import Deque, Dict, List
 
 
 class Trader:
+    def __init__(self):
+        self.max_history = 5  # moving average window
+        self.price_history: Dict[str, Deque[float]] = {}
+        self.sum_history: Dict[str, float] = {}
+
+    def update_price_history(self, product: str, mid_price: float):
+        """Push mid price into the rolling window, keeping its running sum"""
+        history = self.price_history.get(product)
+        if history is None:
+            history = self.price_history[product] = deque(maxlen=self.max_history)
+            self.sum_history[product] = 0.0
+        if len(history) == history.maxlen:
+            self.sum_history[product] -= history[0]
+        history.append(mid_price)
+        self.sum_history[product] += mid_price
+
     def run(self, state: TradingState):
         result = {}
         conversions = 0
-        max_history = 5  # moving average window
 
-        # Load historical price data from traderData
-        if state.traderData:
-            price_history = json.loads(state.traderData)
-        else:
-            price_history = {}
+        # Load historical price data from traderData on a fresh instance
+        if state.traderData and not self.price_history:
+            for product, prices in json.loads(state.traderData).items():
+                self.price_history[product] = deque(prices, maxlen=self.max_history)
+                self.sum_history[product] = sum(self.price_history[product])
 
         position_limits = {
             "RAINFOREST_RESIN": 50,
@@ -26,8 +42,6 @@ class Trader:
             position_limit = position_limits[product]
             current_position = state.position.get(product, 0)
 
-            orders: List[Order] = []
-
             # Get best bid/ask for mid-price calc
             best_ask = min(order_depth.sell_orders.keys()) if order_depth.sell_orders else None
             best_bid = max(order_depth.buy_orders.keys()) if order_depth.buy_orders else None
@@ -37,43 +51,47 @@ class Trader:
                 mid_price = (best_ask + best_bid) / 2
 
                 # Update price history
-                if product not in price_history:
-                    price_history[product] = []
-                price_history[product].append(mid_price)
-                if len(price_history[product]) > max_history:
-                    price_history[product] = price_history[product][-max_history:]
+                self.update_price_history(product, mid_price)
             else:
                 # fallback if no bid/ask data
                 mid_price = 10000 if product == "RAINFOREST_RESIN" else 1000
 
-            # Calculate fair price as moving average
-            history = price_history.get(product, [mid_price])
-            fair_price = sum(history) / len(history)
-
-            # Skip trading logic for SQUID_INK
+            # Skip trading logic for SQUID_INK (no entry means no action)
             if product == "SQUID_INK":
-                result[product] = []
                 continue
 
-            # BUY
-            for ask_price in sorted(order_depth.sell_orders.keys()):
-                ask_volume = order_depth.sell_orders[ask_price]
-                if ask_price < fair_price and current_position < position_limit:
+            # Calculate fair price as moving average
+            history = self.price_history.get(product)
+            fair_price = self.sum_history[product] / len(history) if history else mid_price
+
+            orders: List[Order] = []
+
+            # BUY (only levels below fair price can be taken)
+            if best_ask is not None and best_ask < fair_price:
+                crossing_asks = [(p, v) for p, v in order_depth.sell_orders.items() if p < fair_price]
+                crossing_asks.sort()
+                for ask_price, ask_volume in crossing_asks:
+                    if current_position >= position_limit:
+                        break
                     volume = min(-ask_volume, position_limit - current_position)
                     orders.append(Order(product, ask_price, volume))
                     current_position += volume
 
-            # SELL
-            for bid_price in sorted(order_depth.buy_orders.keys(), reverse=True):
-                bid_volume = order_depth.buy_orders[bid_price]
-                if bid_price > fair_price and current_position > -position_limit:
+            # SELL (only levels above fair price can be hit)
+            if best_bid is not None and best_bid > fair_price:
+                crossing_bids = [(p, v) for p, v in order_depth.buy_orders.items() if p > fair_price]
+                crossing_bids.sort(reverse=True)
+                for bid_price, bid_volume in crossing_bids:
+                    if current_position <= -position_limit:
+                        break
                     volume = min(bid_volume, current_position + position_limit)
                     orders.append(Order(product, bid_price, -volume))
                     current_position -= volume
 
-            result[product] = orders
+            if orders:
+                result[product] = orders
 
         # Save updated price history to traderData
-        traderData = json.dumps(price_history)
+        traderData = json.dumps({product: list(history) for product, history in self.price_history.items()})
 
         return result, conversions, traderData
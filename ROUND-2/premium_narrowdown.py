@@ -1,7 +1,20 @@
 import json
-import statistics
+import math
+from bisect import bisect_left, insort
+from collections import deque
 from datamodel import Order, OrderDepth, TradingState
-from typing import Dict, List
+from typing import Deque, Dict, List
+
+try:
+    import orjson
+
+    def json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    json_loads = orjson.loads
+except ImportError:
+    json_dumps = json.dumps
+    json_loads = json.loads
 
 POSITION_LIMITS = {
     "RAINFOREST_RESIN": 50,
@@ -16,23 +29,93 @@ COMPONENTS = {
     "PICNIC_BASKET2": {"CROISSANTS": 4, "JAMS": 2}
 }
 
+def vwap(levels: Dict[int, int]) -> float:
+    """Volume-weighted price of one book side (sell volumes are negative, so the signs cancel)"""
+    notional = volume = 0
+    for price, qty in levels.items():
+        notional += price * qty
+        volume += qty
+    return notional / volume
+
+class RollingMedian:
+    """Median over a sliding window, kept as a sorted list next to arrival order"""
+    __slots__ = ("window", "values", "sorted_values")
+
+    def __init__(self, window: int, values=()):
+        self.window = window
+        self.values: Deque[float] = deque(maxlen=window)
+        self.sorted_values: List[float] = []
+        for value in values:
+            self.add(value)
+
+    def __len__(self):
+        return len(self.values)
+
+    def add(self, value: float):
+        if len(self.values) == self.window:
+            del self.sorted_values[bisect_left(self.sorted_values, self.values[0])]
+        self.values.append(value)
+        insort(self.sorted_values, value)
+
+    def median(self) -> float:
+        n = len(self.sorted_values)
+        mid = n // 2
+        if n % 2:
+            return self.sorted_values[mid]
+        return (self.sorted_values[mid - 1] + self.sorted_values[mid]) / 2
+
 class Trader:
+    __slots__ = (
+        "croissant_window",
+        "croissant_history",
+        "croissant_sum",
+        "croissant_sumsq",
+        "std_threshold",
+        "max_trade_size",
+        "max_history",
+        "price_history",
+        "sum_history",
+        "basket_component_list",
+        "spread_window",
+        "spread_history",
+        "trader_data",
+        "last_trader_data",
+        "dynamic_params",
+        "MIN_TRADE_SIZE",
+        "MAX_TRADE_VOLUME",
+        "PROFIT_TARGET",
+    )
+
     def __init__(self):
 
-        self.croissant_history = []
         self.croissant_window = 100
+        self.croissant_history: Deque[float] = deque(maxlen=self.croissant_window)
+        self.croissant_sum = 0.0
+        self.croissant_sumsq = 0.0
         self.std_threshold = 1.5
         self.max_trade_size = 10
 
+        self.max_history = 5
+        self.price_history: Dict[str, Deque[float]] = {}
+        self.sum_history: Dict[str, float] = {}
+
+        self.basket_component_list = {
+            basket: list(components.items()) for basket, components in COMPONENTS.items()
+        }
+
+        self.spread_window = 20
+        self.spread_history: Dict[str, RollingMedian] = {
+            "PICNIC_BASKET1": RollingMedian(self.spread_window),
+            "PICNIC_BASKET2": RollingMedian(self.spread_window)
+        }
+
+        # Rolling windows live on the instance; traderData is only read back
+        # when it differs from what this instance last returned.
         self.trader_data = {
-            "spread_history": {
-                "PICNIC_BASKET1": [],
-                "PICNIC_BASKET2": []
-            },
             "last_timestamp": 0,
-            "open_positions": {},
-            "price_history": {}  
+            "open_positions": {}
         }
+        self.last_trader_data = ""
         
         self.dynamic_params = {
             "PICNIC_BASKET1": {
@@ -52,25 +135,40 @@ class Trader:
         self.MAX_TRADE_VOLUME = 5
         self.PROFIT_TARGET = 1.5
 
+    def update_price_history(self, product: str, mid_price: float):
+        """Maintain rolling window and running sum for RAINFOREST_RESIN/KELP"""
+        history = self.price_history.get(product)
+        if history is None:
+            history = self.price_history[product] = deque(maxlen=self.max_history)
+            self.sum_history[product] = 0.0
+        if len(history) == history.maxlen:
+            self.sum_history[product] -= history[0]
+        history.append(mid_price)
+        self.sum_history[product] += mid_price
+
     def update_croissant_history(self, current_price: float):
-        """Maintain rolling window for CROISSANTS"""
+        """Maintain rolling window and running sums for CROISSANTS"""
+        if len(self.croissant_history) == self.croissant_window:
+            old = self.croissant_history[0]
+            self.croissant_sum -= old
+            self.croissant_sumsq -= old * old
         self.croissant_history.append(current_price)
-        if len(self.croissant_history) > self.croissant_window:
-            self.croissant_history.pop(0)
+        self.croissant_sum += current_price
+        self.croissant_sumsq += current_price * current_price
 
     def calculate_z_score(self, current_price: float) -> float:
         """Calculate z-score for CROISSANTS"""
-        if len(self.croissant_history) < self.croissant_window:
+        n = len(self.croissant_history)
+        if n < self.croissant_window:
             return 0
-        mean = statistics.mean(self.croissant_history)
-        std_dev = statistics.stdev(self.croissant_history) if len(self.croissant_history) > 1 else 0
+        mean = self.croissant_sum / n
+        variance = max(0.0, (self.croissant_sumsq - n * mean * mean) / (n - 1)) if n > 1 else 0
+        std_dev = math.sqrt(variance)
         return (current_price - mean) / std_dev if std_dev != 0 else 0
 
-    def calculate_spread_stats(self, order_depth: OrderDepth):
-        """Calculate spread for PICNIC_BASKETs"""
-        if not order_depth.buy_orders or not order_depth.sell_orders:
-            return None
-        return min(order_depth.sell_orders.keys()) - max(order_depth.buy_orders.keys())
+    def calculate_spread_stats(self, best_bid: int, best_ask: int):
+        """Calculate spread for PICNIC_BASKETs from the already-known top of book"""
+        return best_ask - best_bid
 
     def calculate_liquidity(self, order_depth: OrderDepth):
         """Calculate liquidity for PICNIC_BASKETs"""
@@ -83,13 +181,11 @@ class Trader:
 
     def update_dynamic_buffers(self, product: str, current_spread: float):
         """Adjust buffers for PICNIC_BASKETs"""
-        history = self.trader_data["spread_history"][product]
-        history.append(current_spread)
-        if len(history) > 20:
-            history.pop(0)
-        
+        history = self.spread_history[product]
+        history.add(current_spread)
+
         if len(history) >= 5:
-            median_spread = statistics.median(history)
+            median_spread = history.median()
             params = self.dynamic_params[product]
             self.dynamic_params[product]["current_buffer"] = max(
                 params["min_buffer"],
@@ -97,79 +193,97 @@ class Trader:
                     median_spread * params["buffer_multiplier"])
             )
 
-    def calculate_fair_value(self, components, state):
+    def calculate_fair_value(self, basket: str, state):
         """VWAP-based fair value for PICNIC_BASKETs"""
         total = 0
-        for comp, qty in components.items():
+        for comp, qty in self.basket_component_list[basket]:
             depth = state.order_depths.get(comp, None)
             if not depth or not depth.buy_orders or not depth.sell_orders:
                 return None
-            bid_vwap = sum(p*v for p,v in depth.buy_orders.items())/sum(depth.buy_orders.values())
-            ask_vwap = sum(p*abs(v) for p,v in depth.sell_orders.items())/sum(abs(v) for v in depth.sell_orders.values())
-            total += qty * (bid_vwap + ask_vwap)/2
+            total += qty * (vwap(depth.buy_orders) + vwap(depth.sell_orders))/2
         return total
 
+    def restore_trader_data(self, trader_data: str):
+        """Rebuild rolling windows from a traderData snapshot"""
+        try:
+            loaded_data = json_loads(trader_data)
+        except ValueError:
+            return
+        if not isinstance(loaded_data, dict):
+            return
+
+        self.price_history.clear()
+        self.sum_history.clear()
+        try:
+            self.trader_data["last_timestamp"] = loaded_data.get("last_timestamp", 0)
+            self.trader_data["open_positions"] = loaded_data.get("open_positions", {})
+
+            for product, prices in loaded_data.get("price_history", {}).items():
+                history = self.price_history[product] = deque(prices, maxlen=self.max_history)
+                self.sum_history[product] = sum(history)
+
+            for basket, spreads in loaded_data.get("spread_history", {}).items():
+                if basket in self.spread_history:
+                    self.spread_history[basket] = RollingMedian(self.spread_window, spreads)
+        except (ValueError, TypeError, AttributeError):
+            # Malformed snapshot: start again from empty windows
+            self.trader_data["last_timestamp"] = 0
+            self.trader_data["open_positions"] = {}
+            self.price_history.clear()
+            self.sum_history.clear()
+            for basket in self.spread_history:
+                self.spread_history[basket] = RollingMedian(self.spread_window)
+
     def run(self, state: TradingState):
         result = {}
         conversions = 0
-        max_history = 5  
-
-        # Load trader data
-        if state.traderData:
-            try:
-                loaded_data = json.loads(state.traderData)
-                for key in loaded_data:
-                    if key in self.trader_data:
-                        if isinstance(self.trader_data[key], dict):
-                            self.trader_data[key].update(loaded_data[key])
-                        else:
-                            self.trader_data[key] = loaded_data[key]
-            except:
-                pass
-
-        for product in state.order_depths:
-            if product not in POSITION_LIMITS:
-                continue  
 
+        # Load trader data (only needed on a fresh instance)
+        if state.traderData and state.traderData != self.last_trader_data:
+            self.restore_trader_data(state.traderData)
+
+        # Only products we trade that have a two-sided book this tick
+        tradable = [
+            product for product, order_depth in state.order_depths.items()
+            if product in POSITION_LIMITS and order_depth.buy_orders and order_depth.sell_orders
+        ]
+
+        for product in tradable:
             order_depth = state.order_depths[product]
             position_limit = POSITION_LIMITS[product]
             current_position = state.position.get(product, 0)
             orders = []
 
-            # Skip if no market data
-            if not order_depth.buy_orders or not order_depth.sell_orders:
-                result[product] = []
-                continue
-
             best_bid = max(order_depth.buy_orders.keys())
             best_ask = min(order_depth.sell_orders.keys())
             mid_price = (best_bid + best_ask) / 2
 
             # RAINFOREST_RESIN and KELP strategy (simple mean reversion)
             if product in ["RAINFOREST_RESIN", "KELP"]:
-                Update price history
-                if product not in self.trader_data["price_history"]:
-                    self.trader_data["price_history"][product] = []
-                self.trader_data["price_history"][product].append(mid_price)
-                if len(self.trader_data["price_history"][product]) > max_history:
-                    self.trader_data["price_history"][product] = self.trader_data["price_history"][product][-max_history:]
-                
+                # Update price history
+                self.update_price_history(product, mid_price)
+
                 # Calculate fair price as moving average
-                history = self.trader_data["price_history"].get(product, [mid_price])
-                fair_price = sum(history) / len(history)
+                fair_price = self.sum_history[product] / len(self.price_history[product])
 
                 # BUY if price is below fair value
-                for ask_price in sorted(order_depth.sell_orders.keys()):
-                    ask_volume = order_depth.sell_orders[ask_price]
-                    if ask_price < fair_price and current_position < position_limit:
+                if best_ask < fair_price:
+                    crossing_asks = [(p, v) for p, v in order_depth.sell_orders.items() if p < fair_price]
+                    crossing_asks.sort()
+                    for ask_price, ask_volume in crossing_asks:
+                        if current_position >= position_limit:
+                            break
                         volume = min(-ask_volume, position_limit - current_position)
                         orders.append(Order(product, ask_price, volume))
                         current_position += volume
 
                 # SELL if price is above fair value
-                for bid_price in sorted(order_depth.buy_orders.keys(), reverse=True):
-                    bid_volume = order_depth.buy_orders[bid_price]
-                    if bid_price > fair_price and current_position > -position_limit:
+                if best_bid > fair_price:
+                    crossing_bids = [(p, v) for p, v in order_depth.buy_orders.items() if p > fair_price]
+                    crossing_bids.sort(reverse=True)
+                    for bid_price, bid_volume in crossing_bids:
+                        if current_position <= -position_limit:
+                            break
                         volume = min(bid_volume, current_position + position_limit)
                         orders.append(Order(product, bid_price, -volume))
                         current_position -= volume
@@ -196,7 +310,13 @@ class Trader:
                     if buy_volume > 0:
                         orders.append(Order(product, best_ask, buy_volume))
 
-            result[product] = orders
+            if orders:
+                result[product] = orders
 
         self.trader_data["last_timestamp"] = state.timestamp
-        return result, conversions, json.dumps(self.trader_data)
+        self.last_trader_data = json_dumps({
+            **self.trader_data,
+            "price_history": {product: list(history) for product, history in self.price_history.items()},
+            "spread_history": {basket: list(history.values) for basket, history in self.spread_history.items()}
+        })
+        return result, conversions, self.last_trader_data
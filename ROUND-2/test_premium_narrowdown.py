@@ -0,0 +1,67 @@
+import json
+import os
+import sys
+import types
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    import datamodel
+except ImportError:
+    # Minimal stand-in for the exchange's datamodel module
+    datamodel = types.ModuleType("datamodel")
+
+    class Order:
+        def __init__(self, symbol, price, quantity):
+            self.symbol = symbol
+            self.price = price
+            self.quantity = quantity
+
+    class OrderDepth:
+        def __init__(self):
+            self.buy_orders = {}
+            self.sell_orders = {}
+
+    class TradingState:
+        def __init__(self, traderData, timestamp, order_depths, position):
+            self.traderData = traderData
+            self.timestamp = timestamp
+            self.order_depths = order_depths
+            self.position = position
+
+    datamodel.Order = Order
+    datamodel.OrderDepth = OrderDepth
+    datamodel.TradingState = TradingState
+    sys.modules["datamodel"] = datamodel
+
+from premium_narrowdown import Trader
+
+
+def make_state(trader_data, timestamp, bids, asks):
+    depth = datamodel.OrderDepth()
+    depth.buy_orders = dict(bids)
+    depth.sell_orders = dict(asks)
+    return datamodel.TradingState(trader_data, timestamp, {"RAINFOREST_RESIN": depth}, {})
+
+
+class TraderSmokeTest(unittest.TestCase):
+    def test_run_single_tick(self):
+        result, conversions, trader_data = Trader().run(
+            make_state("", 0, {9998: 10}, {10002: -10})
+        )
+        self.assertEqual(result, {})
+        self.assertEqual(conversions, 0)
+        self.assertEqual(json.loads(trader_data)["price_history"], {"RAINFOREST_RESIN": [10000.0]})
+
+    def test_buys_below_moving_average_after_restore(self):
+        _, _, trader_data = Trader().run(make_state("", 0, {9998: 10}, {10002: -10}))
+
+        # Fresh instance, as when the harness does not keep the Trader alive
+        result, _, _ = Trader().run(make_state(trader_data, 100, {9996: 10}, {9998: -7}))
+        orders = result["RAINFOREST_RESIN"]
+        self.assertEqual([(o.price, o.quantity) for o in orders], [(9998, 7)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,14 +1,52 @@
 from datamodel import OrderDepth, TradingState, Order
-from typing import Dict, List, Tuple
+from typing import Deque, Dict, List, Set, Tuple
+from collections import deque
 import json
-import statistics
+import math
+
+try:
+    import orjson
+
+    def json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    json_loads = orjson.loads
+except ImportError:
+    json_dumps = json.dumps
+    json_loads = json.loads
 
 class Trader:
+    __slots__ = (
+        "vr_max_short",
+        "vr_price",
+        "vr_last_prices",
+        "vr_strikes",
+        "vr_seen_products",
+        "vr_voucher_products",
+        "pb_position_limits",
+        "pb_components",
+        "pb_croissant_window",
+        "pb_croissant_history",
+        "pb_croissant_sum",
+        "pb_croissant_sumsq",
+        "pb_std_threshold",
+        "pb_max_trade_size",
+        "pb_max_history",
+        "pb_price_history",
+        "pb_sum_history",
+        "pb_dynamic_params",
+        "trader_data",
+        "last_trader_data",
+    )
+
     def __init__(self):
 
         self.vr_max_short = 200  
         self.vr_price = 10500  
-        self.vr_last_prices = []  
+        self.vr_last_prices: Deque[float] = deque(maxlen=20)
+        self.vr_strikes: Dict[str, int] = {}
+        self.vr_seen_products: Set[str] = set()
+        self.vr_voucher_products: Set[str] = set()
         
         self.pb_position_limits = {
             "RAINFOREST_RESIN": 50,
@@ -25,10 +63,16 @@ class Trader:
         }
         
 
-        self.pb_croissant_history = []
         self.pb_croissant_window = 100
+        self.pb_croissant_history: Deque[float] = deque(maxlen=self.pb_croissant_window)
+        self.pb_croissant_sum = 0.0
+        self.pb_croissant_sumsq = 0.0
         self.pb_std_threshold = 1.5
         self.pb_max_trade_size = 10
+
+        self.pb_max_history = 5
+        self.pb_price_history: Dict[str, Deque[float]] = {}
+        self.pb_sum_history: Dict[str, float] = {}
         
         self.pb_dynamic_params = {
             "PICNIC_BASKET1": {
@@ -45,65 +89,96 @@ class Trader:
             }
         }
         
+        # Rolling windows live on the instance; traderData is only read back
+        # when it differs from what this instance last returned.
         self.trader_data = {
-            "last_timestamp": 0,
-            "price_history": {},
-            "spread_history": {
-                "PICNIC_BASKET1": [],
-                "PICNIC_BASKET2": []
-            }
+            "last_timestamp": 0
         }
+        self.last_trader_data = ""
 
     def run(self, state: TradingState) -> Tuple[Dict[str, List[Order]], int, str]:
         result = {}
         conversions = 0
         
-        if state.traderData:
-            try:
-                loaded_data = json.loads(state.traderData)
-                for key in loaded_data:
-                    if key in self.trader_data:
-                        if isinstance(self.trader_data[key], dict):
-                            self.trader_data[key].update(loaded_data[key])
-                        else:
-                            self.trader_data[key] = loaded_data[key]
-            except:
-                pass
-
-        self.vr_update_market_data(state)
-        for product in state.order_depths:
-            if product.startswith('VOLCANIC_ROCK_VOUCHER'):
-                orders = self.vr_short_itm_voucher(product, state)
-                if orders:
-                    result[product] = orders
+        if state.traderData and state.traderData != self.last_trader_data:
+            self.restore_trader_data(state.traderData)
 
+        summary = self.book_summary(state)
 
+        self.vr_update_market_data(summary)
+        self.vr_classify_products(state)
         for product in state.order_depths:
-            if product in self.pb_position_limits:
-                orders = self.pb_process_product(product, state)
-                if orders:
-                    result[product] = orders
+            if product in self.vr_voucher_products:
+                orders = self.vr_short_itm_voucher(product, state)
+            elif product in self.pb_position_limits and product in summary:
+                orders = self.pb_process_product(product, state, summary[product])
+            else:
+                continue
+            if orders:
+                result[product] = orders
 
 
         self.trader_data["last_timestamp"] = state.timestamp
-        trader_data_str = json.dumps(self.trader_data)
-        
-        return result, conversions, trader_data_str
+        self.last_trader_data = json_dumps({
+            **self.trader_data,
+            "price_history": {product: list(history) for product, history in self.pb_price_history.items()}
+        })
 
-    def vr_update_market_data(self, state: TradingState):
+        return result, conversions, self.last_trader_data
+
+    def restore_trader_data(self, trader_data: str):
+        """Rebuild rolling windows from a traderData snapshot"""
+        try:
+            loaded_data = json_loads(trader_data)
+        except ValueError:
+            return
+        if not isinstance(loaded_data, dict):
+            return
+
+        self.pb_price_history.clear()
+        self.pb_sum_history.clear()
+        try:
+            self.trader_data["last_timestamp"] = loaded_data.get("last_timestamp", 0)
+
+            for product, prices in loaded_data.get("price_history", {}).items():
+                history = self.pb_price_history[product] = deque(prices, maxlen=self.pb_max_history)
+                self.pb_sum_history[product] = sum(history)
+        except (ValueError, TypeError, AttributeError):
+            # Malformed snapshot: start again from empty windows
+            self.trader_data["last_timestamp"] = 0
+            self.pb_price_history.clear()
+            self.pb_sum_history.clear()
+
+    def book_summary(self, state: TradingState) -> Dict[str, Tuple[int, int, float]]:
+        """(best_bid, best_ask, mid) for every two-sided book the strategies read"""
+        summary = {}
+        for product, order_depth in state.order_depths.items():
+            if product != 'VOLCANIC_ROCK' and product not in self.pb_position_limits:
+                continue
+            if order_depth.buy_orders and order_depth.sell_orders:
+                best_bid = max(order_depth.buy_orders)
+                best_ask = min(order_depth.sell_orders)
+                summary[product] = (best_bid, best_ask, (best_bid + best_ask) / 2)
+        return summary
+
+    def vr_update_market_data(self, summary: Dict[str, Tuple[int, int, float]]):
         """Update VR market data"""
-        if 'VOLCANIC_ROCK' in state.order_depths:
-            bids = state.order_depths['VOLCANIC_ROCK'].buy_orders
-            asks = state.order_depths['VOLCANIC_ROCK'].sell_orders
-            if bids and asks:
-                self.vr_price = (max(bids.keys()) + min(asks.keys())) / 2
-                self.vr_last_prices.append(self.vr_price)
-                if len(self.vr_last_prices) > 20:
-                    self.vr_last_prices.pop(0)
+        if 'VOLCANIC_ROCK' in summary:
+            self.vr_price = summary['VOLCANIC_ROCK'][2]
+            self.vr_last_prices.append(self.vr_price)
+
+    def vr_classify_products(self, state: TradingState):
+        """Record voucher products the first time they appear"""
+        for product in state.order_depths.keys() - self.vr_seen_products:
+            self.vr_seen_products.add(product)
+            if product.startswith('VOLCANIC_ROCK_VOUCHER'):
+                self.vr_voucher_products.add(product)
 
     def vr_short_itm_voucher(self, product: str, state: TradingState) -> List[Order]:
         """Generate short orders for ITM vouchers"""
-        strike = int(product.split('_')[-1])
+        strike = self.vr_strikes.get(product)
+        if strike is None:
+            strike = self.vr_strikes[product] = int(product.rsplit('_', 1)[1])
         if self.vr_price <= strike:
             return []
             
@@ -119,42 +194,38 @@ class Trader:
         return [Order(product, price, -quantity)]
 
     # --- Picnic Basket Strategy Methods ---
-    def pb_process_product(self, product: str, state: TradingState) -> List[Order]:
+    def pb_process_product(self, product: str, state: TradingState, book: Tuple[int, int, float]) -> List[Order]:
         """Process Picnic Basket strategy products"""
         order_depth = state.order_depths[product]
         position_limit = self.pb_position_limits[product]
         current_position = state.position.get(product, 0)
         orders = []
 
-        if not order_depth.buy_orders or not order_depth.sell_orders:
-            return orders
-
-        best_bid = max(order_depth.buy_orders.keys())
-        best_ask = min(order_depth.sell_orders.keys())
-        mid_price = (best_bid + best_ask) / 2
+        best_bid, best_ask, mid_price = book
 
         # RAINFOREST_RESIN and KELP strategy
         if product in ["RAINFOREST_RESIN", "KELP"]:
-            if product not in self.trader_data["price_history"]:
-                self.trader_data["price_history"][product] = []
-            self.trader_data["price_history"][product].append(mid_price)
-            if len(self.trader_data["price_history"][product]) > 5:
-                self.trader_data["price_history"][product] = self.trader_data["price_history"][product][-5:]
-            
-            fair_price = sum(self.trader_data["price_history"][product]) / len(self.trader_data["price_history"][product])
+            self.pb_update_price_history(product, mid_price)
+            fair_price = self.pb_sum_history[product] / len(self.pb_price_history[product])
 
             # BUY if price is below fair value
-            for ask_price in sorted(order_depth.sell_orders.keys()):
-                ask_volume = order_depth.sell_orders[ask_price]
-                if ask_price < fair_price and current_position < position_limit:
+            if best_ask < fair_price:
+                crossing_asks = [(p, v) for p, v in order_depth.sell_orders.items() if p < fair_price]
+                crossing_asks.sort()
+                for ask_price, ask_volume in crossing_asks:
+                    if current_position >= position_limit:
+                        break
                     volume = min(-ask_volume, position_limit - current_position)
                     orders.append(Order(product, ask_price, volume))
                     current_position += volume
 
             # SELL if price is above fair value
-            for bid_price in sorted(order_depth.buy_orders.keys(), reverse=True):
-                bid_volume = order_depth.buy_orders[bid_price]
-                if bid_price > fair_price and current_position > -position_limit:
+            if best_bid > fair_price:
+                crossing_bids = [(p, v) for p, v in order_depth.buy_orders.items() if p > fair_price]
+                crossing_bids.sort(reverse=True)
+                for bid_price, bid_volume in crossing_bids:
+                    if current_position <= -position_limit:
+                        break
                     volume = min(bid_volume, current_position + position_limit)
                     orders.append(Order(product, bid_price, -volume))
                     current_position -= volume
@@ -182,16 +253,33 @@ class Trader:
 
         return orders
 
+    def pb_update_price_history(self, product: str, mid_price: float):
+        """Maintain rolling window and running sum for RAINFOREST_RESIN/KELP"""
+        history = self.pb_price_history.get(product)
+        if history is None:
+            history = self.pb_price_history[product] = deque(maxlen=self.pb_max_history)
+            self.pb_sum_history[product] = 0.0
+        if len(history) == history.maxlen:
+            self.pb_sum_history[product] -= history[0]
+        history.append(mid_price)
+        self.pb_sum_history[product] += mid_price
+
     def pb_update_croissant_history(self, current_price: float):
-        """Maintain rolling window for CROISSANTS"""
+        """Maintain rolling window and running sums for CROISSANTS"""
+        if len(self.pb_croissant_history) == self.pb_croissant_window:
+            old = self.pb_croissant_history[0]
+            self.pb_croissant_sum -= old
+            self.pb_croissant_sumsq -= old * old
         self.pb_croissant_history.append(current_price)
-        if len(self.pb_croissant_history) > self.pb_croissant_window:
-            self.pb_croissant_history.pop(0)
+        self.pb_croissant_sum += current_price
+        self.pb_croissant_sumsq += current_price * current_price
 
     def pb_calculate_z_score(self, current_price: float) -> float:
         """Calculate z-score for CROISSANTS"""
-        if len(self.pb_croissant_history) < self.pb_croissant_window:
+        n = len(self.pb_croissant_history)
+        if n < self.pb_croissant_window:
             return 0
-        mean = statistics.mean(self.pb_croissant_history)
-        std_dev = statistics.stdev(self.pb_croissant_history) if len(self.pb_croissant_history) > 1 else 0
+        mean = self.pb_croissant_sum / n
+        variance = max(0.0, (self.pb_croissant_sumsq - n * mean * mean) / (n - 1)) if n > 1 else 0
+        std_dev = math.sqrt(variance)
         return (current_price - mean) / std_dev if std_dev != 0 else 0